@@ -0,0 +1,375 @@
+"""
+APG 분류 모델 하이퍼파라미터 탐색 실행기
+
+deeplearning_apg.py에 고정되어 있던 모델 구조와 하이퍼파라미터(필터 수, 드롭아웃, l2, 학습률,
+배치 크기, 에폭)를 탐색 공간(JSON)으로 받아 여러 프로세스에서 병렬로 학습합니다.
+
+- 각 에폭의 검증 정확도를 데이터셋별 공유 SQLite 파일에 기록하고, 같은 데이터셋·같은 에폭의
+  다른 시도들의 중앙값보다 낮으면 학습을 조기 중단(pruning)합니다.
+- 완료된 시도는 설정 해시(설정 + 데이터)로 캐시하여 다시 실행해도 건너뜁니다.
+  조기 중단된 시도는 함께 실행된 시도와 중단 설정에 따라 결과가 달라지므로 캐시하지 않고 다시 학습합니다.
+- 시도별 정확도, 학습 시간, 추론 시간을 leaderboard.csv로 저장합니다 (완료된 시도가 조기 중단된 시도보다 앞).
+
+탐색 공간 예시 (값 목록의 모든 조합을 탐색):
+    {"conv1_filters": [32, 64], "dropout1": [0.3, 0.5], "learning_rate": [0.001, 0.0005]}
+
+사용법:
+    python apg_sweep.py --wave-dir "apg 파일" --labels "2024-10-11 (11-00-32)-APG【 이기장 】.csv" \\
+        --space space.json --jobs 4
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+# deeplearning_apg.py의 기본 설정
+DEFAULT_CONFIG = {
+    'series_length': 200,
+    'conv1_filters': 64,
+    'conv2_filters': 32,
+    'kernel_size': 3,
+    'dropout1': 0.5,
+    'dropout2': 0.3,
+    'dense_units': 64,
+    'dense_dropout': 0.3,
+    'l2': 0.001,
+    'learning_rate': 0.001,
+    'batch_size': 32,
+    'epochs': 100,
+}
+NUM_CLASSES = 18
+
+# TypeLebel에 따른 VasType 조정값
+TYPE_LABEL_OFFSET = {'+++': 3, '++': 2, '+': 1}
+
+
+def load_dataset(wave_dir, label_csv, series_length=200):
+    """
+    측정 파일과 라벨 파일에서 학습 데이터 생성 (deeplearning_apg.py와 같은 전처리)
+
+    측정 파일은 파일 이름(측정 시각) 순으로, 라벨은 TestDate 순으로 정렬하여 맞춥니다.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    paths = []
+    for root, dirs, files in os.walk(wave_dir):
+        for file in files:
+            if file.endswith(".csv"):
+                paths.append(os.path.join(root, file))
+    paths.sort(key=os.path.basename)
+
+    data = []
+    for path in paths:
+        df = pd.read_csv(path, usecols=['APG Wave'])
+        series = df.values.flatten()[:series_length].reshape(-1, 1)
+        data.append(MinMaxScaler().fit_transform(series))
+    X = np.array(data).reshape(len(data), -1)
+
+    labels = pd.read_csv(label_csv).sort_values(by='TestDate')
+    y = (labels['VasType'] * 3 - labels['TypeLebel'].map(TYPE_LABEL_OFFSET).fillna(0)).astype(int).values
+
+    if len(X) != len(y):
+        raise ValueError(f"측정 파일 수({len(X)})와 라벨 수({len(y)})가 다릅니다.")
+    return X, y
+
+
+def prepare_dataset(X, y, output_path):
+    """SMOTE 오버샘플링 후 학습/검증 분할하여 저장하고 데이터 해시 반환"""
+    from imblearn.over_sampling import SMOTE
+    from sklearn.model_selection import train_test_split
+
+    X_res, y_res = SMOTE(random_state=42, k_neighbors=2).fit_resample(X, y)
+    X_train, X_val, y_train, y_val = train_test_split(X_res, y_res, test_size=0.2, random_state=42)
+    np.savez(output_path, X_train=X_train, X_val=X_val, y_train=y_train, y_val=y_val)
+
+    digest = hashlib.sha256()
+    for array in (X_train, X_val, y_train, y_val):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def expand_space(space, max_trials=None, seed=42):
+    """탐색 공간의 조합을 설정 목록으로 펼치기 (max_trials가 있으면 무작위 추출)"""
+    unknown = sorted(set(space) - set(DEFAULT_CONFIG))
+    if unknown:
+        raise ValueError(f"알 수 없는 설정 항목입니다: {unknown} (사용 가능: {sorted(DEFAULT_CONFIG)})")
+
+    keys = sorted(space)
+    values = [space[key] if isinstance(space[key], list) else [space[key]] for key in keys]
+    configs = [dict(DEFAULT_CONFIG, **dict(zip(keys, combo))) for combo in itertools.product(*values)]
+    if max_trials is not None and len(configs) > max_trials:
+        configs = random.Random(seed).sample(configs, max_trials)
+    return configs
+
+
+def config_hash(config, data_hash):
+    """설정과 학습 데이터로 시도 식별 해시 생성"""
+    payload = json.dumps({'config': config, 'data': data_hash}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def build_model(config, input_length):
+    """설정값으로 deeplearning_apg.py와 같은 구조의 1D CNN 생성"""
+    from tensorflow.keras import regularizers
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Conv1D, Dropout, Flatten, Dense, BatchNormalization
+    from tensorflow.keras.optimizers import Adam
+    from tensorflow.keras.losses import SparseCategoricalCrossentropy
+
+    model = Sequential([
+        Conv1D(config['conv1_filters'], kernel_size=config['kernel_size'], activation='relu',
+               input_shape=(input_length, 1)),
+        BatchNormalization(),
+        Dropout(config['dropout1']),
+        Conv1D(config['conv2_filters'], kernel_size=config['kernel_size'], activation='relu'),
+        BatchNormalization(),
+        Dropout(config['dropout2']),
+        Flatten(),
+        Dense(config['dense_units'], activation='relu', kernel_regularizer=regularizers.l2(config['l2'])),
+        Dropout(config['dense_dropout']),
+        Dense(NUM_CLASSES, activation='softmax')
+    ])
+    model.compile(optimizer=Adam(learning_rate=config['learning_rate']),
+                  loss=SparseCategoricalCrossentropy(),
+                  metrics=['accuracy'])
+    return model
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS intermediate (
+            trial TEXT NOT NULL,
+            epoch INTEGER NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (trial, epoch)
+        )
+    """)
+    return conn
+
+
+def intermediate_db_path(output_dir, data_hash):
+    """데이터셋별 조기 중단 기록 파일 경로 (다른 데이터셋의 시도와 비교하지 않도록 분리)"""
+    return os.path.join(output_dir, f"intermediate_{data_hash[:16]}.sqlite3")
+
+
+def should_prune(db_path, trial, epoch, value, warmup_epochs, min_trials):
+    """
+    중앙값 기준 조기 중단 판단
+
+    같은 에폭까지 진행한 다른 시도가 min_trials개 이상이고, 현재 검증 정확도가
+    그 중앙값보다 낮으면 중단합니다.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO intermediate (trial, epoch, value) VALUES (?, ?, ?)",
+            (trial, epoch, value)
+        )
+        if epoch < warmup_epochs:
+            return False
+        others = [row[0] for row in conn.execute(
+            "SELECT value FROM intermediate WHERE epoch = ? AND trial != ?", (epoch, trial)
+        )]
+    finally:
+        conn.close()
+
+    return len(others) >= min_trials and value < np.median(others)
+
+
+def run_trial(config, trial, data_path, db_path, warmup_epochs, min_trials, num_threads):
+    """하나의 설정으로 학습하고 결과 반환 (별도 프로세스에서 실행)"""
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(num_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import Callback, ReduceLROnPlateau
+    from sklearn.utils.class_weight import compute_class_weight
+
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    data = np.load(data_path)
+    X_train, X_val = data['X_train'], data['X_val']
+    y_train, y_val = data['y_train'], data['y_val']
+
+    class_weights = compute_class_weight('balanced', classes=np.unique(y_train), y=y_train)
+    class_weight_dict = {int(label): weight for label, weight in zip(np.unique(y_train), class_weights)}
+
+    class PruningCallback(Callback):
+        def __init__(self):
+            super().__init__()
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            value = float((logs or {}).get('val_accuracy', 0.0))
+            if should_prune(db_path, trial, epoch, value, warmup_epochs, min_trials):
+                self.pruned = True
+                self.model.stop_training = True
+
+    pruning = PruningCallback()
+    lr_scheduler = ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=1e-6)
+    model = build_model(config, X_train.shape[1])
+
+    start = time.perf_counter()
+    history = model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        batch_size=config['batch_size'],
+        epochs=config['epochs'],
+        class_weight=class_weight_dict,
+        callbacks=[lr_scheduler, pruning],
+        verbose=0
+    )
+    train_time = time.perf_counter() - start
+
+    # 추론 시간 측정 (첫 호출의 그래프 생성 시간 제외)
+    model.predict(X_val[:1], verbose=0)
+    start = time.perf_counter()
+    model.predict(X_val, verbose=0)
+    inference_time = time.perf_counter() - start
+
+    val_accuracies = history.history['val_accuracy']
+    return {
+        'trial': trial,
+        'status': 'pruned' if pruning.pruned else 'complete',
+        'val_accuracy': float(val_accuracies[-1]),
+        'best_val_accuracy': float(max(val_accuracies)),
+        'epochs_run': len(val_accuracies),
+        'train_time_s': train_time,
+        'inference_ms_per_sample': inference_time * 1000 / len(X_val),
+        'params': int(model.count_params()),
+        'config': config,
+    }
+
+
+def load_cached_result(trial_dir, trial):
+    """캐시된 시도 결과 읽기 (없거나 조기 중단된 시도이면 None)"""
+    cache_path = os.path.join(trial_dir, f"{trial}.json")
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path) as f:
+        result = json.load(f)
+    return result if result.get('status') == 'complete' else None
+
+
+def run_sweep(configs, data_path, data_hash, output_dir, jobs=1, warmup_epochs=10, min_trials=2):
+    """
+    설정 목록을 병렬로 학습하고 시도별 결과 목록 반환
+
+    완료되어 캐시된 시도(output_dir/trials/<해시>.json)는 다시 학습하지 않습니다.
+    조기 중단 기록은 데이터셋마다 별도 파일에 저장하여 다른 데이터셋의 시도와 비교하지 않습니다.
+    """
+    trial_dir = os.path.join(output_dir, 'trials')
+    if not os.path.exists(trial_dir):
+        os.makedirs(trial_dir)
+    db_path = intermediate_db_path(output_dir, data_hash)
+    _connect(db_path).close()
+
+    results = []
+    pending = []
+    for config in configs:
+        trial = config_hash(config, data_hash)
+        cached = load_cached_result(trial_dir, trial)
+        if cached is not None:
+            results.append(cached)
+            print(f"[캐시] {trial}")
+        else:
+            pending.append((trial, config))
+
+    # TensorFlow는 fork 이후 안전하지 않으므로 spawn으로 프로세스 생성
+    num_threads = max(1, multiprocessing.cpu_count() // max(1, jobs))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        futures = {
+            executor.submit(run_trial, config, trial, data_path, db_path,
+                            warmup_epochs, min_trials, num_threads): trial
+            for trial, config in pending
+        }
+        for future in as_completed(futures):
+            trial = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[실패] {trial}: {e}")
+                continue
+
+            if result['status'] == 'complete':
+                with open(os.path.join(trial_dir, f"{trial}.json"), 'w') as f:
+                    json.dump(result, f, indent=2)
+            results.append(result)
+            print(f"[{result['status']}] {trial} val_accuracy={result['val_accuracy']:.2%} "
+                  f"epochs={result['epochs_run']} train={result['train_time_s']:.1f}s")
+
+    return results
+
+
+def make_leaderboard(results):
+    """
+    시도 결과를 정확도(내림차순), 추론 시간(오름차순) 순으로 정렬한 표로 변환
+
+    조기 중단된 시도의 정확도는 학습 도중 값이므로 완료된 시도 뒤에 따로 정렬합니다.
+    """
+    leaderboard = pd.DataFrame([
+        dict({key: value for key, value in result.items() if key != 'config'}, **result['config'])
+        for result in results
+    ])
+    if not leaderboard.empty:
+        leaderboard['pruned'] = leaderboard['status'] != 'complete'
+        leaderboard = leaderboard.sort_values(
+            by=['pruned', 'val_accuracy', 'inference_ms_per_sample'], ascending=[True, False, True],
+            kind='stable'
+        ).drop(columns='pruned').reset_index(drop=True)
+    return leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APG 모델 하이퍼파라미터 탐색")
+    parser.add_argument('--wave-dir', required=True, help="APG 측정 CSV 디렉터리")
+    parser.add_argument('--labels', required=True, help="장비 메타데이터(라벨) CSV")
+    parser.add_argument('--space', help="탐색 공간 JSON 파일 (없으면 기본 설정 1개)")
+    parser.add_argument('--output-dir', default='sweep', help="결과 및 캐시 디렉터리")
+    parser.add_argument('--jobs', type=int, default=max(1, multiprocessing.cpu_count() // 2),
+                        help="동시에 학습할 시도 수")
+    parser.add_argument('--max-trials', type=int, help="최대 시도 수 (초과 시 무작위 추출)")
+    parser.add_argument('--warmup-epochs', type=int, default=10, help="조기 중단을 시작할 에폭")
+    parser.add_argument('--min-trials', type=int, default=2, help="조기 중단 판단에 필요한 비교 시도 수")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    space = {}
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = expand_space(space, args.max_trials, args.seed)
+
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    # 입력 길이별로 데이터셋을 한 번만 만들어 해당 시도들이 공유
+    results = []
+    for series_length in sorted({config['series_length'] for config in configs}):
+        X, y = load_dataset(args.wave_dir, args.labels, series_length)
+        data_path = os.path.join(args.output_dir, f"dataset_{series_length}.npz")
+        data_hash = prepare_dataset(X, y, data_path)
+        results += run_sweep(
+            [config for config in configs if config['series_length'] == series_length],
+            data_path, data_hash, args.output_dir,
+            jobs=args.jobs, warmup_epochs=args.warmup_epochs, min_trials=args.min_trials,
+        )
+
+    leaderboard = make_leaderboard(results)
+    leaderboard.to_csv(os.path.join(args.output_dir, 'leaderboard.csv'), index=False)
+    print(leaderboard.head(10).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+"""
+APG 원시 측정 데이터 아카이브
+
+`uploads/`의 측정 CSV(약 1000행, 행마다 Date/Time 문자열 반복)를 대량으로 다시 읽는 대신,
+모든 샘플을 int16으로 하나의 파일에 이어 붙여 저장하고 memmap으로 읽습니다.
+
+- samples.i16: 모든 측정의 샘플을 순서대로 이어 붙인 추가 전용(append-only) 파일
+- index.sqlite3: 측정별 (오프셋, 길이)와 대상자/측정 시각/내용 해시 색인
+
+사용법:
+    python apg_archive.py import uploads archive
+"""
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_DTYPE = np.dtype('<i2')
+SAMPLES_FILE = 'samples.i16'
+INDEX_FILE = 'index.sqlite3'
+
+# 측정 파일 이름 형식: 2024-10-04 (15-21-58) [대상자 ID][이름][성별][나이] APG_Wave...
+FILENAME_PATTERN = re.compile(
+    r'^(\d{4}-\d{2}-\d{2}) \((\d{2})-(\d{2})-(\d{2})\) \[([^\]]*)\]\[([^\]]*)\]\[([^\]]*)\]\[(\d+)\]'
+)
+
+META_COLUMNS = [
+    'id', 'offset', 'length', 'subject_id', 'subject_name', 'sex', 'age',
+    'recorded_at', 'content_hash', 'source',
+]
+
+
+class ApgArchive:
+    def __init__(self, root):
+        """
+        Parameters:
+        - root: 아카이브 디렉터리 (없으면 생성)
+        """
+        self.root = root
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+        self.samples_path = os.path.join(root, SAMPLES_FILE)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        if not os.path.exists(self.samples_path):
+            open(self.samples_path, 'wb').close()
+
+        self._memmap = None
+        self._init_index()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_index(self):
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS recordings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    subject_id TEXT,
+                    subject_name TEXT,
+                    sex TEXT,
+                    age INTEGER,
+                    recorded_at TEXT,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    source TEXT
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_recordings_subject ON recordings (subject_id, recorded_at)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_recordings_time ON recordings (recorded_at)")
+        finally:
+            conn.close()
+
+    def _samples(self, required=0):
+        """
+        전체 샘플 파일의 읽기 전용 memmap (파일이 커졌으면 다시 매핑)
+
+        required: 매핑이 포함해야 하는 최소 샘플 수 (색인에서 읽은 레코드의 끝 위치)
+        색인은 샘플을 파일에 쓴 뒤에 커밋되므로, 파일이 이보다 짧으면 아카이브가 손상된 것입니다.
+        """
+        n_samples = os.path.getsize(self.samples_path) // SAMPLE_DTYPE.itemsize
+        if n_samples < required:
+            raise RuntimeError(
+                f"샘플 파일이 색인보다 짧습니다 (파일: {n_samples}, 필요: {required}): {self.samples_path}"
+            )
+        if n_samples == 0:
+            return np.empty(0, dtype=SAMPLE_DTYPE)
+        if self._memmap is None or len(self._memmap) < n_samples:
+            self._memmap = np.memmap(self.samples_path, dtype=SAMPLE_DTYPE, mode='r', shape=(n_samples,))
+        return self._memmap
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+        finally:
+            conn.close()
+
+    def append(self, samples, subject_id=None, subject_name=None, sex=None, age=None,
+               recorded_at=None, source=None):
+        """
+        측정 하나를 아카이브에 추가하고 레코드 ID 반환
+
+        내용 해시가 같은 측정이 이미 있으면 새로 저장하지 않고 기존 레코드 ID를 반환합니다.
+        NaN/inf가 포함된 측정은 int16으로 저장할 수 없으므로 ValueError를 발생시킵니다.
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.ndim != 1:
+            raise ValueError("샘플은 1차원 배열이어야 합니다.")
+        if not np.isfinite(samples).all():
+            raise ValueError("샘플에 NaN 또는 무한대 값이 포함되어 있습니다.")
+        info = np.iinfo(SAMPLE_DTYPE)
+        if samples.size and (samples.min() < info.min or samples.max() > info.max):
+            raise ValueError("샘플 값이 int16 범위를 벗어났습니다.")
+
+        data = np.rint(samples).astype(SAMPLE_DTYPE).tobytes()
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        conn = self._connect()
+        try:
+            # 색인 쓰기 잠금으로 동시에 추가하는 프로세스 간 오프셋 충돌 방지
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM recordings WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("ROLLBACK")
+                return row['id']
+
+            with open(self.samples_path, 'ab') as f:
+                offset = f.tell() // SAMPLE_DTYPE.itemsize
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            cursor = conn.execute(
+                "INSERT INTO recordings (offset, length, subject_id, subject_name, sex, age, "
+                "recorded_at, content_hash, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (offset, len(samples), subject_id, subject_name, sex, age,
+                 recorded_at, content_hash, source)
+            )
+            conn.execute("COMMIT")
+            return cursor.lastrowid
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def find(self, subject_id=None, start=None, end=None, content_hash=None):
+        """
+        조건에 맞는 측정 메타데이터 목록 (파일 내 저장 순서)
+
+        Parameters:
+        - subject_id: 대상자 ID
+        - start, end: 측정 시각 범위 ('YYYY-MM-DD HH:MM:SS', end는 미포함)
+        - content_hash: 샘플 내용 해시
+        """
+        conditions = []
+        params = []
+        if subject_id is not None:
+            conditions.append("subject_id = ?")
+            params.append(subject_id)
+        if start is not None:
+            conditions.append("recorded_at >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("recorded_at < ?")
+            params.append(end)
+        if content_hash is not None:
+            conditions.append("content_hash = ?")
+            params.append(content_hash)
+
+        query = f"SELECT {', '.join(META_COLUMNS)} FROM recordings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY offset"
+
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+
+    def get(self, record_id):
+        """레코드 ID로 (메타데이터, 샘플) 조회 - 샘플은 복사 없는 memmap 뷰"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(META_COLUMNS)} FROM recordings WHERE id = ?", (record_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            raise KeyError(f"레코드가 존재하지 않습니다: {record_id}")
+        meta = dict(row)
+        end = meta['offset'] + meta['length']
+        return meta, self._samples(end)[meta['offset']:end]
+
+    def scan(self, subject_id=None, start=None, end=None):
+        """
+        조건에 맞는 측정을 (메타데이터, 샘플) 순으로 반환하는 제너레이터
+
+        파일 내 저장 순서대로 읽으므로 전체 재처리 시 순차 읽기가 됩니다.
+        색인을 먼저 조회한 뒤 매핑하므로, 그 사이 다른 프로세스가 추가한 측정도 잘리지 않습니다.
+        """
+        records = self.find(subject_id=subject_id, start=start, end=end)
+        if not records:
+            return
+        samples = self._samples(max(meta['offset'] + meta['length'] for meta in records))
+        for meta in records:
+            yield meta, samples[meta['offset']:meta['offset'] + meta['length']]
+
+
+def parse_recording_filename(filename):
+    """측정 파일 이름에서 측정 시각과 대상자 정보 추출 (형식이 다르면 None)"""
+    match = FILENAME_PATTERN.match(os.path.basename(filename))
+    if match is None:
+        return None
+
+    date, hour, minute, second, subject_id, subject_name, sex, age = match.groups()
+    return {
+        'recorded_at': f"{date} {hour}:{minute}:{second}",
+        'subject_id': subject_id,
+        'subject_name': subject_name,
+        'sex': sex,
+        'age': int(age),
+    }
+
+
+def import_csv_directory(archive, directory):
+    """
+    디렉터리의 측정 CSV 파일들을 아카이브로 가져오기
+
+    Returns:
+    - (추가된 측정 수, 건너뛴 파일 수)
+    """
+    existing = len(archive)
+    skipped = 0
+    for root, dirs, files in os.walk(directory):
+        for file in sorted(files):
+            if not file.endswith('.csv'):
+                continue
+
+            full_path = os.path.join(root, file)
+            try:
+                data = pd.read_csv(full_path)
+            except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+                logger.warning(f"CSV 파일을 읽을 수 없습니다: {full_path} ({e})")
+                skipped += 1
+                continue
+            if 'APG Wave' not in data.columns:
+                logger.warning(f"APG Wave 열이 없는 파일은 건너뜁니다: {full_path}")
+                skipped += 1
+                continue
+
+            meta = parse_recording_filename(file) or {}
+            # 측정 시작 시각은 첫 행의 Date/Time 사용 (파일 이름의 시각은 측정 종료 시각)
+            if 'Date' in data.columns and 'Time' in data.columns and len(data) > 0:
+                meta['recorded_at'] = f"{data['Date'].iloc[0]} {data['Time'].iloc[0]}"
+
+            try:
+                archive.append(data['APG Wave'].values, source=file, **meta)
+            except ValueError as e:
+                # 빈 값(NaN)이나 범위를 벗어난 값이 있는 측정은 건너뜀
+                logger.warning(f"저장할 수 없는 측정은 건너뜁니다: {full_path} ({e})")
+                skipped += 1
+
+    return len(archive) - existing, skipped
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="APG 측정 데이터 아카이브")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="CSV 측정 파일 가져오기")
+    import_parser.add_argument('csv_dir', help="측정 CSV 파일 디렉터리")
+    import_parser.add_argument('archive_dir', help="아카이브 디렉터리")
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        imported, skipped = import_csv_directory(ApgArchive(args.archive_dir), args.csv_dir)
+        logger.info(f"측정 {imported}개를 가져왔습니다. (건너뛴 파일: {skipped}개)")
@@ -0,0 +1,267 @@
+"""
+APG 특징 추출 엔진
+
+원시 `APG Wave`에서 박동 형태 특징(a~e 기준점 시간/진폭, 비율, 속도파/용적파 면적 등)을 계산합니다.
+
+여러 박동을 (박동 수, BEAT_LENGTH) 배열로 묶어 한 번에 벡터 연산으로 처리하며,
+적분(속도파/용적파), 국소 극값 마스크, 기준점(a~e) 인덱스는 한 번만 계산하여 모든 특징에서 재사용합니다.
+결과는 특징별 열로 구성된 DataFrame(박동당 1행)으로 반환되며,
+summarize_recording / extract_files_features로 측정당 1행으로 요약할 수 있습니다.
+
+열 이름 규칙:
+- DEVICE_COLUMNS: 장비 메타데이터 내보내기(`data files/`)와 같은 이름을 쓰는 열.
+  측정별 중앙값이 내보내기 값과 중앙 상대 오차 10% 이내로 일치하고, 측정 간 변화가 장비 값과
+  같은 방향(순위 상관계수 0.5 이상)임을 테스트로 검증합니다.
+- ENGINE_COLUMNS: 이 엔진의 정의(일반적인 APG/PPG 정의)를 따르는 열. 장비 알고리즘이 공개되어 있지 않아
+  장비 값(EI, EEI, DI, IPA, RI, PH, ESP_amp, pArea 등)과 크기/정의가 다르므로 장비 이름을 쓰지 않습니다.
+  장비 이름과 대응하는 항목이라도 위 검증을 통과하지 못한 것(aTime, dTime, eTime, A1_time, Crest_T)은
+  엔진 이름(a_ms, d_ms, e_ms, sys_peak_ms)을 사용합니다.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.signal import find_peaks
+
+# 측정 장비 샘플링 주파수 (1000 샘플 / 10초)
+SAMPLING_RATE = 100
+# 박동 하나를 리샘플링할 길이
+BEAT_LENGTH = 128
+# a파 피크 이전의 박동 시작점 오프셋 (ms)
+ONSET_OFFSET_MS = 60
+
+# 장비 내보내기와 비교 검증된 열 (장비 열 이름 사용)
+DEVICE_COLUMNS = ['avePulse', 'bBya', 'bTime', 'cTime']
+# 엔진 고유 정의 열 (장비 값과 직접 비교 불가)
+ENGINE_COLUMNS = [
+    'a_ms', 'd_ms', 'e_ms', 'sys_peak_ms',
+    'apg_a', 'apg_b', 'apg_c', 'apg_d', 'apg_e',
+    'c_a_ratio', 'd_a_ratio', 'e_a_ratio', 'aging_index',
+    'vpg_max', 'beat_ms', 'diastolic_ms', 'sys_dia_ms',
+    'ppg_pulse_height', 'ppg_sys_amp', 'ppg_dia_amp',
+    'sys_notch_ratio', 'dia_notch_ratio', 'notch_sys_ratio',
+    'reflection_pct', 'area_ratio_pct',
+    'ppg_area_systolic', 'ppg_area_diastolic', 'ppg_area', 'apg_a_area',
+]
+FEATURE_COLUMNS = DEVICE_COLUMNS + ENGINE_COLUMNS
+
+
+def segment_beats(apg_wave, fs=SAMPLING_RATE, beat_length=BEAT_LENGTH):
+    """
+    연속 APG 신호를 박동 단위로 분할하고 같은 길이로 리샘플링
+
+    Parameters:
+    - apg_wave: 1차원 APG 신호 (장비 원시값)
+    - fs: 샘플링 주파수 (Hz)
+    - beat_length: 박동당 리샘플링 길이
+
+    Returns:
+    - beats: (박동 수, beat_length) 배열, 기준선(중앙값)을 뺀 APG
+    - durations_ms: 각 박동의 길이 (ms)
+    """
+    signal = np.asarray(apg_wave, dtype=np.float64)
+    if signal.size == 0:
+        return np.empty((0, beat_length)), np.empty(0)
+    baseline = np.median(signal)
+    signal = signal - baseline
+
+    # a파는 박동마다 가장 큰 양의 피크 (최대 심박수 180bpm 기준 최소 간격)
+    peaks_a, _ = find_peaks(
+        signal, distance=max(1, int(fs / 3)), prominence=0.5 * np.ptp(signal)
+    )
+    onsets = peaks_a - int(round(ONSET_OFFSET_MS * fs / 1000))
+    onsets = onsets[onsets >= 0]
+    if len(onsets) < 2:
+        return np.empty((0, beat_length)), np.empty(0)
+
+    starts = onsets[:-1]
+    lengths = np.diff(onsets)
+
+    # 박동 길이가 중앙값에서 크게 벗어나는 구간(잡음, 누락 박동) 제거
+    median_length = np.median(lengths)
+    keep = np.abs(lengths - median_length) <= 0.5 * median_length
+    starts = starts[keep]
+    lengths = lengths[keep]
+
+    # 모든 박동을 한 번에 선형 보간 (다음 박동 시작점까지 포함)
+    grid = np.linspace(0.0, 1.0, beat_length)
+    positions = starts[:, None] + grid[None, :] * lengths[:, None]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, len(signal) - 1)
+    frac = positions - lower
+    beats = signal[lower] * (1.0 - frac) + signal[upper] * frac
+
+    return beats, lengths * 1000.0 / fs
+
+
+def _first_after(mask, start):
+    """각 행에서 start 이후 처음으로 mask가 참인 인덱스 (없으면 -1)"""
+    idx = np.arange(mask.shape[1])
+    candidates = mask & (idx[None, :] > start[:, None])
+    found = candidates.any(axis=1) & (start >= 0)
+    return np.where(found, candidates.argmax(axis=1), -1)
+
+
+def _take(values, positions):
+    """각 행에서 positions 위치의 값 추출 (위치가 -1이면 NaN)"""
+    taken = np.take_along_axis(values, np.clip(positions, 0, None)[:, None], axis=1)[:, 0]
+    return np.where(positions >= 0, taken, np.nan)
+
+
+def _ratio(numerator, denominator):
+    """0 또는 NaN으로 나누는 경우 NaN을 반환하는 나눗셈"""
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    valid = np.isfinite(numerator) & np.isfinite(denominator) & (denominator != 0)
+    np.divide(numerator, denominator, out=out, where=valid)
+    return out
+
+
+def _detrend_cumsum(values, dt, grid):
+    """누적 적분 후 시작점과 끝점이 같아지도록 선형 추세 제거"""
+    integral = np.cumsum(values, axis=1) * dt[:, None]
+    integral = integral - integral[:, :1]
+    return integral - grid[None, :] * integral[:, -1:]
+
+
+def extract_features(beats, durations_ms):
+    """
+    박동 배치에서 장비와 동일한 항목의 특징을 계산
+
+    Parameters:
+    - beats: (박동 수, 길이) APG 배열 (segment_beats 결과)
+    - durations_ms: 각 박동의 길이 (ms)
+
+    Returns:
+    - FEATURE_COLUMNS 열을 가지는 DataFrame (박동당 1행, 계산 불가 항목은 NaN)
+    """
+    apg = np.asarray(beats, dtype=np.float64)
+    durations_ms = np.asarray(durations_ms, dtype=np.float64)
+    n_beats, length = apg.shape
+    idx = np.arange(length)
+    grid = idx / (length - 1)
+    dt_ms = durations_ms / (length - 1)
+
+    # 공통 중간값 1: 국소 극대/극소 마스크
+    is_max = np.zeros_like(apg, dtype=bool)
+    is_min = np.zeros_like(apg, dtype=bool)
+    is_max[:, 1:-1] = (apg[:, 1:-1] > apg[:, :-2]) & (apg[:, 1:-1] >= apg[:, 2:])
+    is_min[:, 1:-1] = (apg[:, 1:-1] < apg[:, :-2]) & (apg[:, 1:-1] <= apg[:, 2:])
+
+    # 공통 중간값 2: a~e 기준점 인덱스 (analyze_apg_signal과 같은 순서로 탐색)
+    a_idx = np.argmax(np.where(idx[None, :] < length // 2, apg, -np.inf), axis=1)
+    b_idx = np.argmin(np.where(idx[None, :] >= a_idx[:, None], apg, np.inf), axis=1)
+    c_idx = _first_after(is_max, b_idx)
+    d_idx = _first_after(is_min, c_idx)
+    e_idx = _first_after(is_max, d_idx)
+
+    a_val = _take(apg, a_idx)
+    b_val = _take(apg, b_idx)
+    c_val = _take(apg, c_idx)
+    d_val = _take(apg, d_idx)
+    e_val = _take(apg, e_idx)
+
+    # 공통 중간값 3: 적분 - 속도파(VPG)와 용적파(PPG)
+    dt_s = dt_ms / 1000.0
+    vpg = _detrend_cumsum(apg, dt_s, grid)
+    ppg = _detrend_cumsum(vpg, dt_s, grid)
+    ppg = ppg - ppg.min(axis=1, keepdims=True)
+
+    # 용적파 기준점: 수축기 피크, 중복 절흔(e점), 이완기 피크
+    # 이완기 피크가 뚜렷하지 않으면 절흔 이후 변곡점(속도파 극대)을 대신 사용
+    sys_idx = np.argmax(ppg, axis=1)
+    notch_idx = e_idx
+    ppg_max = np.zeros_like(ppg, dtype=bool)
+    vpg_max = np.zeros_like(vpg, dtype=bool)
+    ppg_max[:, 1:-1] = (ppg[:, 1:-1] > ppg[:, :-2]) & (ppg[:, 1:-1] >= ppg[:, 2:])
+    vpg_max[:, 1:-1] = (vpg[:, 1:-1] > vpg[:, :-2]) & (vpg[:, 1:-1] >= vpg[:, 2:])
+    dia_idx = _first_after(ppg_max, notch_idx)
+    dia_idx = np.where(dia_idx >= 0, dia_idx, _first_after(vpg_max, notch_idx))
+    esp_amp = _take(ppg, sys_idx)
+    lsp_amp = _take(ppg, dia_idx)
+    notch_amp = _take(ppg, notch_idx)
+
+    before_notch = idx[None, :] < notch_idx[:, None]
+    a1_area = np.where(notch_idx >= 0, (ppg * before_notch).sum(axis=1) * dt_ms, np.nan)
+    a2_area = np.where(notch_idx >= 0, (ppg * ~before_notch).sum(axis=1) * dt_ms, np.nan)
+    e_ms = np.where(e_idx >= 0, e_idx * dt_ms, np.nan)
+
+    features = {
+        # 장비 내보내기와 같은 정의
+        'avePulse': _ratio(60000.0, durations_ms),
+        'bBya': _ratio(b_val, a_val),
+        'bTime': b_idx * dt_ms,
+        'cTime': np.where(c_idx >= 0, c_idx * dt_ms, np.nan),
+
+        # 엔진 고유 정의 - 시간은 박동 시작점(a파 피크 ONSET_OFFSET_MS 이전) 기준
+        # a_ms는 시작점 정의상 거의 ONSET_OFFSET_MS로 고정됨
+        'a_ms': a_idx * dt_ms,
+        'd_ms': np.where(d_idx >= 0, d_idx * dt_ms, np.nan),
+        # e점 = 중복 절흔 (수축기 종료 시간)
+        'e_ms': e_ms,
+        'sys_peak_ms': sys_idx * dt_ms,
+
+        # 엔진 고유 정의 - 진폭은 기준선을 뺀 장비 원시값 단위
+        'apg_a': a_val,
+        'apg_b': b_val,
+        'apg_c': c_val,
+        'apg_d': d_val,
+        'apg_e': e_val,
+        'c_a_ratio': _ratio(c_val, a_val),
+        'd_a_ratio': _ratio(d_val, a_val),
+        'e_a_ratio': _ratio(e_val, a_val),
+        # 노화 지수 (b - c - d - e) / a
+        'aging_index': _ratio(b_val - c_val - d_val - e_val, a_val),
+        # 수축기 상승 기울기 (속도파 최대값)
+        'vpg_max': vpg.max(axis=1),
+        'beat_ms': durations_ms,
+        'diastolic_ms': durations_ms - e_ms,
+        'sys_dia_ms': np.where(dia_idx >= 0, (dia_idx - sys_idx) * dt_ms, np.nan),
+        # 용적파 진폭/면적은 APG를 두 번 적분한 값이므로 장비 단위와 다름
+        'ppg_pulse_height': esp_amp - ppg[:, 0],
+        'ppg_sys_amp': esp_amp,
+        'ppg_dia_amp': lsp_amp,
+        'sys_notch_ratio': _ratio(esp_amp, notch_amp),
+        'dia_notch_ratio': _ratio(lsp_amp, notch_amp),
+        'notch_sys_ratio': _ratio(notch_amp, esp_amp),
+        'reflection_pct': 100.0 * _ratio(lsp_amp, esp_amp),
+        'area_ratio_pct': 100.0 * _ratio(a2_area, a1_area),
+        'ppg_area_systolic': a1_area,
+        'ppg_area_diastolic': a2_area,
+        'ppg_area': ppg.sum(axis=1) * dt_ms,
+        # a파(양의 가속도) 면적
+        'apg_a_area': (np.clip(apg, 0, None) * (idx[None, :] < b_idx[:, None])).sum(axis=1) * dt_ms,
+    }
+
+    return pd.DataFrame(features, columns=FEATURE_COLUMNS, index=pd.RangeIndex(n_beats, name='beat'))
+
+
+def extract_recording_features(apg_wave, fs=SAMPLING_RATE):
+    """연속 APG 신호 하나의 박동별 특징 계산"""
+    beats, durations_ms = segment_beats(apg_wave, fs=fs)
+    return extract_features(beats, durations_ms)
+
+
+def extract_file_features(file_path, fs=SAMPLING_RATE):
+    """측정 CSV 파일(`APG Wave` 열)의 박동별 특징 계산"""
+    data = pd.read_csv(file_path, usecols=['APG Wave'])
+    return extract_recording_features(data['APG Wave'].values, fs=fs)
+
+
+def summarize_recording(features):
+    """
+    박동별 특징을 측정 하나의 특징으로 요약 (장비 내보내기처럼 측정당 1행)
+
+    잡음 박동의 영향을 줄이기 위해 열별 중앙값을 사용하며, 사용한 박동 수(n_beats)를 함께 반환합니다.
+    """
+    summary = features.median() if len(features) else pd.Series(np.nan, index=features.columns)
+    summary['n_beats'] = len(features)
+    return summary
+
+
+def extract_files_features(file_paths, fs=SAMPLING_RATE):
+    """여러 측정 CSV 파일의 측정별 특징 표 (파일 이름을 인덱스로 사용, 분류기 입력용)"""
+    summaries = {
+        os.path.basename(path): summarize_recording(extract_file_features(path, fs=fs))
+        for path in file_paths
+    }
+    return pd.DataFrame.from_dict(summaries, orient='index', columns=FEATURE_COLUMNS + ['n_beats'])
@@ -3,14 +3,14 @@ import mysql.connector
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required
-from model import predict, preprocess_input_data
+from model import predict, preprocess_input_data, load_configured_model, model as preloaded_model
 import bcrypt
 import pandas as pd
 from dotenv import load_dotenv
 import logging
 from scipy.signal import find_peaks, savgol_filter  # savgol_filter 추가
 import numpy as np
-from tensorflow.keras.models import load_model
+from job_queue import JobQueue, QueueFullError, PermanentJobError
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -36,15 +36,14 @@ app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 # JWTManager 초기화
 jwt = JWTManager(app)
 
-# Lazy Loading을 위한 모델 로드
-MODEL_PATH = os.getenv('MODEL_PATH')
-model = None
+# Lazy Loading을 위한 모델 로드 (model.py에서 이미 로드된 모델이 있으면 재사용)
+model = preloaded_model
 
 def get_model():
     global model
     if model is None:
         try:
-            model = load_model(MODEL_PATH)
+            model = load_configured_model()
             logger.info("모델 로드에 성공했습니다.")
         except Exception as e:
             logger.error(f"모델 로드 실패: {e}")
@@ -362,83 +361,107 @@ def analyze_apg_signal(file_path):
         'apg_wave': ppg_signal.tolist()
     }
 
+def save_uploaded_file(saved_name=None):
+    """
+    요청에 포함된 CSV 파일을 업로드 폴더에 저장
+
+    Parameters:
+    - saved_name: 저장할 파일 이름 (없으면 업로드한 파일 이름 사용)
+
+    Returns:
+    - (파일 경로, None) 또는 (None, 오류 응답)
+    """
+    if 'file' not in request.files:
+        return None, (jsonify({"error": "파일이 존재하지 않습니다."}), 400)
+
+    file = request.files['file']
+    if not file.filename.endswith('.csv'):
+        return None, (jsonify({"error": "올바른 형식의 CSV 파일을 업로드해주세요."}), 400)
+
+    # 파일 저장
+    upload_folder = 'uploads'
+    if not os.path.exists(upload_folder):
+        os.makedirs(upload_folder)
+    file_path = os.path.join(upload_folder, saved_name or file.filename)
+    file.save(file_path)
+    return file_path, None
+
+def run_vascular_analysis(file_path):
+    """
+    저장된 CSV 파일의 혈관 분석 수행
+
+    Returns:
+    - (응답 데이터, HTTP 상태 코드)
+    """
+    # analyze_apg_signal 함수 호출
+    analysis_result = analyze_apg_signal(file_path)
+
+    # 주요 피크 추출
+    a_peak = analysis_result['peaks']['A']
+    b_peak = analysis_result['peaks']['B']
+    c_peak = analysis_result['peaks']['C']
+    d_peak = analysis_result['peaks']['D']
+    e_peak = analysis_result['peaks']['E']
+
+    a_idx = analysis_result['peak_idx']['A_idx']
+    b_idx = analysis_result['peak_idx']['B_idx']
+    c_idx = analysis_result['peak_idx']['C_idx']
+    d_idx = analysis_result['peak_idx']['D_idx']
+    e_idx = analysis_result['peak_idx']['E_idx']
+
+    if None in [a_peak, b_peak, c_peak, d_peak, e_peak]:
+        return {'error': '피크 값을 찾는 데 충분한 데이터가 없습니다.'}, 400
+
+    # 피크 비율 계산 (절대값 사용)
+    ab_ratio = abs(b_peak) / abs(a_peak)
+    ca_ratio = abs(c_peak) / abs(a_peak)
+    da_ratio = abs(d_peak) / abs(a_peak)
+
+    # 맥파 타입 분류 - 별도의 함수로 분류 진행 (이미 정의된 함수 사용)
+    wave_type = classify_wave_type_improved(ab_ratio, ca_ratio, da_ratio)
+
+    # 솔루션 제공
+    advice = vascular_health_advice(wave_type)
+
+    # 응답 데이터 구성
+    response = {
+        'peaks': {
+            'A': float(a_peak),
+            'B': float(b_peak),
+            'C': float(c_peak),
+            'D': float(d_peak),
+            'E': float(e_peak),
+        },
+        'index' :{
+            'A_idx': int(a_idx),
+            'B_idx': int(b_idx),
+            'C_idx': int(c_idx),
+            'D_idx': int(d_idx),
+            'E_idx': int(e_idx),                
+        } ,
+        'ratios': {
+            'A/B': float(ab_ratio),
+            'C/A': float(ca_ratio),
+            'D/A': float(da_ratio),
+        },
+        'wave_type': wave_type,
+        'apg_wave': analysis_result['apg_wave'],
+        'advice': advice
+    }
+
+    return response, 200
+
 # 예측 API
 @app.route('/analyze-vascular', methods=['POST'])
 def analyze_vascular():
     try:
         # 데이터 업로드 처리
-        if 'file' in request.files:
-            file = request.files['file']
-            if not file.filename.endswith('.csv'):
-                return jsonify({"error": "올바른 형식의 CSV 파일을 업로드해주세요."}), 400
-
-            # 파일 저장 및 읽기
-            upload_folder = 'uploads'
-            if not os.path.exists(upload_folder):
-                os.makedirs(upload_folder)
-            file_path = os.path.join(upload_folder, file.filename)
-            file.save(file_path)
+        file_path, error_response = save_uploaded_file()
+        if error_response:
+            return error_response
 
-        else:
-            return jsonify({"error": "파일이 존재하지 않습니다."}), 400
-
-        # analyze_apg_signal 함수 호출
-        analysis_result = analyze_apg_signal(file_path)
-
-        # 주요 피크 추출
-        a_peak = analysis_result['peaks']['A']
-        b_peak = analysis_result['peaks']['B']
-        c_peak = analysis_result['peaks']['C']
-        d_peak = analysis_result['peaks']['D']
-        e_peak = analysis_result['peaks']['E']
-
-        a_idx = analysis_result['peak_idx']['A_idx']
-        b_idx = analysis_result['peak_idx']['B_idx']
-        c_idx = analysis_result['peak_idx']['C_idx']
-        d_idx = analysis_result['peak_idx']['D_idx']
-        e_idx = analysis_result['peak_idx']['E_idx']
-
-        if None in [a_peak, b_peak, c_peak, d_peak, e_peak]:
-            return jsonify({'error': '피크 값을 찾는 데 충분한 데이터가 없습니다.'}), 400
-
-        # 피크 비율 계산 (절대값 사용)
-        ab_ratio = abs(b_peak) / abs(a_peak)
-        ca_ratio = abs(c_peak) / abs(a_peak)
-        da_ratio = abs(d_peak) / abs(a_peak)
-
-        # 맥파 타입 분류 - 별도의 함수로 분류 진행 (이미 정의된 함수 사용)
-        wave_type = classify_wave_type_improved(ab_ratio, ca_ratio, da_ratio)
-
-        # 솔루션 제공
-        advice = vascular_health_advice(wave_type)
-
-        # 응답 데이터 구성
-        response = {
-            'peaks': {
-                'A': float(a_peak),
-                'B': float(b_peak),
-                'C': float(c_peak),
-                'D': float(d_peak),
-                'E': float(e_peak),
-            },
-            'index' :{
-                'A_idx': int(a_idx),
-                'B_idx': int(b_idx),
-                'C_idx': int(c_idx),
-                'D_idx': int(d_idx),
-                'E_idx': int(e_idx),                
-            } ,
-            'ratios': {
-                'A/B': float(ab_ratio),
-                'C/A': float(ca_ratio),
-                'D/A': float(da_ratio),
-            },
-            'wave_type': wave_type,
-            'apg_wave': analysis_result['apg_wave'],
-            'advice': advice
-        }
-
-        return jsonify(response), 200
+        response, status_code = run_vascular_analysis(file_path)
+        return jsonify(response), status_code
 
     except pd.errors.EmptyDataError:
         logger.error("CSV 파일이 비어 있습니다.")
@@ -454,6 +477,73 @@ def analyze_vascular():
         return jsonify({"error": f"혈관 분석 중 오류가 발생했습니다: {str(e)}"}), 500
 
 
+# 비동기 작업 큐 설정 (SQLite 파일 기반, 외부 브로커 불필요)
+# JOB_WORKERS는 프로세스(gunicorn 워커)마다의 스레드 수, JOB_MAX_RUNNING은 모든 프로세스를 합친 동시 실행 수
+job_queue = JobQueue(
+    os.getenv('JOB_DB_PATH', 'jobs.sqlite3'),
+    max_workers=int(os.getenv('JOB_WORKERS', 2)),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', 100)),
+    max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', 3)),
+    max_running=int(os.getenv('JOB_MAX_RUNNING', 2)),
+)
+
+def analyze_vascular_job(payload):
+    """작업 큐에서 실행되는 혈관 분석"""
+    try:
+        response, status_code = run_vascular_analysis(payload['file_path'])
+    except (pd.errors.EmptyDataError, ValueError) as e:
+        # 입력 데이터 문제는 재시도해도 결과가 같으므로 바로 실패 처리
+        raise PermanentJobError(f"데이터 처리 중 오류가 발생했습니다: {str(e)}")
+
+    if status_code >= 400:
+        raise PermanentJobError(response['error'])
+    return response
+
+job_queue.register('analyze_vascular', analyze_vascular_job)
+
+# 비동기 예측 API - 작업 ID를 즉시 반환
+@app.route('/jobs/analyze-vascular', methods=['POST'])
+def submit_analyze_vascular():
+    # 같은 이름의 파일이 다시 업로드되어도 대기 중인 작업의 파일을 덮어쓰지 않도록 작업 ID로 저장
+    job_id = job_queue.new_job_id()
+    file_path, error_response = save_uploaded_file(f"job_{job_id}.csv")
+    if error_response:
+        return error_response
+
+    try:
+        job_queue.submit('analyze_vascular', {'file_path': file_path}, job_id=job_id)
+    except QueueFullError as e:
+        logger.warning(f"작업 큐가 가득 찼습니다: {e}")
+        os.remove(file_path)
+        return jsonify({"error": "현재 처리 중인 작업이 많습니다. 잠시 후 다시 시도하세요."}), 503, {'Retry-After': '5'}
+
+    return jsonify({"job_id": job_id, "status": "queued"}), 202, {'Location': f"/jobs/{job_id}"}
+
+# 작업 상태 조회 API
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+
+    job.pop('result')
+    return jsonify(job), 200
+
+# 작업 결과 조회 API
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+
+    if job['status'] == 'done':
+        return jsonify(job['result']), 200
+    if job['status'] == 'failed':
+        return jsonify({"error": job['error']}), 422
+    # 아직 처리 중
+    return jsonify({"job_id": job_id, "status": job['status']}), 202
+
+
 if __name__ == '__main__':
     host = os.getenv('FLASK_HOST', '0.0.0.0')  # 기본값 0.0.0.0
     port = int(os.getenv('FLASK_PORT', 5080))  # 기본값 5080
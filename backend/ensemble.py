@@ -0,0 +1,76 @@
+"""
+앙상블 예측 결합
+
+여러 체크포인트 멤버의 출력 (샘플 수, 멤버 수, 클래스 수)을 평균 또는 다수결로 합칩니다.
+TensorFlow 없이 동작하며, 멤버를 하나의 모델로 합치는 load_ensemble은 model.py에 있습니다.
+"""
+import numpy as np
+
+
+class EnsembleModel:
+    """
+    여러 체크포인트를 하나의 모델로 합친 앙상블
+
+    입력 형태와 클래스 수가 같은 모델들을 공유 입력 하나에 연결하여
+    한 번의 배치 forward로 모든 멤버의 출력 (샘플 수, 멤버 수, 클래스 수)을 계산합니다.
+    """
+
+    def __init__(self, fused_model, member_names, method='mean'):
+        if method not in ('mean', 'vote'):
+            raise ValueError(f"지원하지 않는 앙상블 방식입니다: {method}")
+        self.fused_model = fused_model
+        self.member_names = member_names
+        self.method = method
+
+    def predict(self, processed_data):
+        """멤버별 출력 (샘플 수, 멤버 수, 클래스 수) 반환"""
+        return np.asarray(self.fused_model.predict_on_batch(processed_data))
+
+
+def to_probabilities(outputs):
+    """
+    모델 출력이 이미 확률(소프트맥스 출력)이면 그대로, 아니면 소프트맥스 적용
+
+    (샘플, 멤버, 클래스) 출력은 멤버별로 판단하여, 로짓을 출력하는 멤버에만 소프트맥스를 적용합니다.
+    """
+    outputs = np.asarray(outputs, dtype=np.float64)
+    is_probability = (
+        np.all(outputs >= 0, axis=-1) & (np.abs(outputs.sum(axis=-1) - 1.0) <= 1e-3)
+    ).all(axis=0)
+    exp = np.exp(outputs - outputs.max(axis=-1, keepdims=True))
+    return np.where(np.expand_dims(is_probability, -1), outputs, exp / exp.sum(axis=-1, keepdims=True))
+
+
+def predict_ensemble(processed_data, ensemble):
+    """
+    앙상블 예측 - 멤버 확률의 평균 또는 다수결로 예측하고 멤버 간 불일치 정도를 함께 반환
+    """
+    member_probabilities = to_probabilities(ensemble.predict(processed_data))  # (샘플, 멤버, 클래스)
+    mean_probabilities = member_probabilities.mean(axis=1)
+    member_classes = np.argmax(member_probabilities, axis=2)
+    n_members = member_probabilities.shape[1]
+
+    if ensemble.method == 'vote':
+        votes = np.zeros_like(mean_probabilities)
+        np.add.at(votes, (np.arange(len(votes))[:, None], member_classes), 1)
+        # 득표 수가 같으면 평균 확률이 높은 클래스 선택
+        predicted_classes = np.argmax(votes + 0.5 * mean_probabilities, axis=1)
+        confidence_scores = votes[np.arange(len(votes)), predicted_classes] / n_members
+    else:
+        predicted_classes = np.argmax(mean_probabilities, axis=1)
+        confidence_scores = np.max(mean_probabilities, axis=1)
+
+    disagrees = member_classes != predicted_classes[:, None]
+    return {
+        'predictions': predicted_classes.tolist(),
+        'confidence_scores': confidence_scores.tolist(),
+        'ensemble': {
+            'method': ensemble.method,
+            'members': ensemble.member_names,
+            'member_predictions': member_classes.tolist(),
+            # 샘플별: 앙상블 결과와 다르게 예측한 멤버 비율
+            'disagreement': disagrees.mean(axis=1).tolist(),
+            # 멤버별: 앙상블 결과와 다르게 예측한 샘플 비율
+            'member_disagreement': dict(zip(ensemble.member_names, disagrees.mean(axis=0).tolist())),
+        }
+    }
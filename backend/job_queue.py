@@ -0,0 +1,334 @@
+"""
+SQLite 기반 비동기 작업 큐
+
+오래 걸리는 분석 작업을 요청 처리 스레드에서 분리하기 위한 로컬 작업 큐입니다.
+외부 브로커 없이 SQLite 파일 하나에 작업을 저장하므로 프로세스가 재시작되어도 작업이 유지되고,
+gunicorn 워커 여러 개가 같은 큐를 공유할 수 있습니다.
+
+- submit(): 작업을 저장하고 즉시 작업 ID 반환 (대기 작업이 많으면 QueueFullError)
+- 프로세스마다 max_workers개의 워커 스레드가 작업을 가져와 처리하며, 같은 큐를 쓰는 모든 프로세스를 합쳐
+  동시에 처리 중인 작업은 max_running개를 넘지 않음 (gunicorn 워커 수와 무관하게 동시 실행 수 제한)
+- 처리 중 예외가 발생하면 지수 백오프로 재시도, PermanentJobError는 재시도하지 않음
+- 처리 중에는 임대 시간(lease)을 주기적으로 연장하고, 워커가 비정상 종료되어 임대 시간이 지난 작업은
+  다른 워커가 다시 가져감 (시도 횟수를 모두 쓴 작업은 실패 처리)
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """대기 중인 작업 수가 한도를 넘었을 때 발생"""
+
+
+class PermanentJobError(Exception):
+    """재시도해도 결과가 같은 작업 오류 (잘못된 입력 데이터 등)"""
+
+
+class JobQueue:
+    def __init__(self, db_path, max_workers=2, max_pending=100, max_attempts=3,
+                 lease_seconds=300, poll_interval=0.5, max_running=None):
+        """
+        Parameters:
+        - db_path: 작업을 저장할 SQLite 파일 경로
+        - max_workers: 프로세스당 워커 스레드 수
+        - max_pending: 대기/처리 중 작업 수 한도 (초과 시 submit 거부)
+        - max_attempts: 작업당 최대 시도 횟수
+        - lease_seconds: 처리 중 작업의 임대 시간 (처리 중에는 lease_seconds / 3마다 연장,
+          연장이 끊긴 뒤 지나면 다른 워커가 다시 처리)
+        - poll_interval: 대기 작업이 없을 때 큐 확인 간격 (초)
+        - max_running: 모든 프로세스를 합친 동시 처리 작업 수 한도 (None이면 제한 없음)
+        """
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_running = max_running
+
+        self._handlers = {}
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wakeup_event = threading.Event()
+
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    available_at REAL NOT NULL,
+                    locked_until REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, available_at)")
+        finally:
+            conn.close()
+
+    def register(self, kind, handler):
+        """작업 종류별 처리 함수 등록 - handler(payload)는 JSON 직렬화 가능한 결과를 반환"""
+        self._handlers[kind] = handler
+
+    @staticmethod
+    def new_job_id():
+        """새 작업 ID 생성 (작업 파일 이름 등을 submit 전에 정할 때 사용)"""
+        return uuid.uuid4().hex
+
+    def submit(self, kind, payload, job_id=None):
+        """작업을 큐에 넣고 작업 ID 반환 (job_id를 주지 않으면 새로 생성)"""
+        if kind not in self._handlers:
+            raise ValueError(f"등록되지 않은 작업 종류입니다: {kind}")
+
+        job_id = job_id or self.new_job_id()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                conn.execute("ROLLBACK")
+                raise QueueFullError(f"대기 중인 작업이 너무 많습니다 ({pending}개)")
+
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at, updated_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, self.max_attempts, now, now, now)
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        self.start()
+        self._wakeup_event.set()
+        return job_id
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+
+        # 이 프로세스에 워커가 없으면 조회 시점에라도 시작 (재시작 후 남은 작업 처리)
+        self.start()
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'max_attempts': row['max_attempts'],
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+
+    def start(self):
+        """워커 스레드 시작 (fork된 프로세스에서는 새로 시작)"""
+        if self.max_workers <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop_event.clear()
+            self._threads = []
+            for i in range(self.max_workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"job-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"작업 워커 {self.max_workers}개를 시작했습니다. (pid: {self._pid})")
+
+    def stop(self, timeout=None):
+        """워커 스레드 종료"""
+        self._stop_event.set()
+        self._wakeup_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def _claim(self):
+        """처리할 작업 하나를 원자적으로 가져오기"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # 임대 시간이 지났는데 시도 횟수를 모두 쓴 작업은 다시 실행하지 않고 실패 처리
+            expired = conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, ?), locked_until = NULL, updated_at = ? "
+                "WHERE status = ? AND locked_until < ? AND attempts >= max_attempts",
+                (FAILED, "처리 시간이 임대 시간을 넘어 중단되었습니다.", now, RUNNING, now)
+            ).rowcount
+            if expired:
+                logger.error(f"임대 시간이 지난 작업 {expired}개를 실패 처리했습니다.")
+
+            if self.max_running is not None:
+                # 임대 중인 작업만 셈 (임대 시간이 지난 작업은 아래에서 다시 가져갈 수 있음)
+                running = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND locked_until >= ?", (RUNNING, now)
+                ).fetchone()[0]
+                if running >= self.max_running:
+                    conn.execute("COMMIT")
+                    return None
+
+            row = conn.execute(
+                "SELECT * FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND locked_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, now, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, locked_until = ?, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, now + self.lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+            job = dict(row)
+            job['attempts'] += 1
+            return job
+        finally:
+            conn.close()
+
+    def _finish(self, job_id, status, result=None, error=None, available_at=None):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, locked_until = NULL, "
+                "updated_at = ?, available_at = COALESCE(?, available_at) WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, now, available_at, job_id)
+            )
+        finally:
+            conn.close()
+
+    def _renew_lease(self, job_id, done_event):
+        """작업이 끝날 때까지 임대 시간을 주기적으로 연장 (오래 걸리는 작업의 중복 실행 방지)"""
+        interval = max(self.lease_seconds / 3, 0.01)
+        while not done_event.wait(interval):
+            now = time.time()
+            try:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "UPDATE jobs SET locked_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                        (now + self.lease_seconds, now, job_id, RUNNING)
+                    )
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"작업 임대 연장 실패 (id: {job_id}): {e}")
+
+    def _run(self, job):
+        handler = self._handlers.get(job['kind'])
+        if handler is None:
+            self._finish(job['id'], FAILED, error=f"등록되지 않은 작업 종류입니다: {job['kind']}")
+            return
+
+        done_event = threading.Event()
+        renewer = threading.Thread(
+            target=self._renew_lease, args=(job['id'], done_event),
+            name=f"job-lease-{job['id']}", daemon=True
+        )
+        renewer.start()
+        try:
+            result = handler(json.loads(job['payload']))
+        except PermanentJobError as e:
+            logger.error(f"작업 실패 (id: {job['id']}): {e}")
+            self._finish(job['id'], FAILED, error=str(e))
+        except Exception as e:
+            if job['attempts'] < job['max_attempts']:
+                delay = 2 ** job['attempts']
+                logger.warning(f"작업 오류, {delay}초 후 재시도 (id: {job['id']}, 시도: {job['attempts']}): {e}")
+                self._finish(job['id'], QUEUED, error=str(e), available_at=time.time() + delay)
+            else:
+                logger.error(f"작업 최종 실패 (id: {job['id']}): {e}")
+                self._finish(job['id'], FAILED, error=str(e))
+        else:
+            self._finish(job['id'], DONE, result=result)
+        finally:
+            done_event.set()
+            renewer.join()
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"작업 큐 조회 중 오류 발생: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup_event.wait(self.poll_interval)
+                self._wakeup_event.clear()
+                continue
+
+            try:
+                self._run(job)
+            except Exception as e:
+                # 결과 저장 실패 등 - 워커 스레드는 계속 실행
+                logger.error(f"작업 처리 중 오류 발생 (id: {job['id']}): {e}")
+                self._fail_safely(job, str(e))
+
+    def _fail_safely(self, job, error):
+        """
+        _run이 작업 상태를 기록하지 못했을 때 실패 또는 재시도로 기록
+
+        시도 횟수가 남아 있으면 재시도하고, 아니면 실패 처리합니다.
+        여기서도 기록하지 못하면 임대 시간이 지난 뒤 _claim이 다시 가져가거나 실패 처리합니다.
+        """
+        try:
+            if job['attempts'] < job['max_attempts']:
+                self._finish(job['id'], QUEUED, error=error, available_at=time.time() + 2 ** job['attempts'])
+            else:
+                self._finish(job['id'], FAILED, error=error)
+        except Exception as e:
+            logger.error(f"작업 상태 기록 실패 (id: {job['id']}): {e}")
@@ -4,6 +4,7 @@ import numpy as np
 from tensorflow.keras.models import load_model
 from tensorflow.keras.activations import softmax
 import logging
+from ensemble import EnsembleModel, predict_ensemble
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -18,13 +19,83 @@ logger = logging.getLogger(__name__)
 # 모델 로드
 MODEL_PATH = os.getenv('MODEL_PATH')
 
+
+def load_ensemble(paths, method='mean'):
+    """
+    체크포인트 목록(또는 디렉터리)으로 앙상블 생성
+
+    입력 형태/클래스 수가 다른 체크포인트는 함께 계산할 수 없으므로,
+    가장 많은 체크포인트가 속한 그룹만 사용합니다.
+    """
+    from tensorflow.keras import Input, Model
+    from tensorflow.keras.layers import Concatenate, Reshape
+
+    model_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            model_paths += sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith('.keras')
+            )
+        else:
+            model_paths.append(path)
+
+    groups = {}
+    for path in model_paths:
+        try:
+            member = load_model(path)
+        except Exception as e:
+            logger.error(f"앙상블 멤버 로드 실패 ({path}): {e}")
+            continue
+        key = (tuple(member.input_shape[1:]), member.output_shape[-1])
+        groups.setdefault(key, []).append((os.path.basename(path), member))
+
+    if not groups:
+        raise RuntimeError("앙상블에 사용할 수 있는 모델이 없습니다.")
+
+    (input_shape, num_classes), members = max(groups.items(), key=lambda item: len(item[1]))
+    for key, skipped in groups.items():
+        if key[0] != input_shape or key[1] != num_classes:
+            logger.warning(
+                f"입력 형태가 달라 앙상블에서 제외합니다: {[name for name, _ in skipped]} {key}"
+            )
+
+    # 공유 입력 하나에 모든 멤버를 연결 (멤버 이름 충돌을 피하기 위해 새 이름으로 감쌈)
+    inputs = Input(shape=input_shape)
+    outputs = []
+    for i, (name, member) in enumerate(members):
+        wrapped = Model(member.inputs, member.outputs, name=f"member_{i}")
+        outputs.append(Reshape((1, num_classes))(wrapped(inputs, training=False)))
+    fused = outputs[0] if len(outputs) == 1 else Concatenate(axis=1)(outputs)
+    fused_model = Model(inputs, fused, name='ensemble')
+
+    member_names = [name for name, _ in members]
+    logger.info(f"앙상블 모델 로드에 성공했습니다: {member_names} (방식: {method})")
+    return EnsembleModel(fused_model, member_names, method)
+
+
+def load_configured_model():
+    """
+    환경 변수 설정에 따라 단일 모델 또는 앙상블 로드
+
+    ENSEMBLE_MODEL_PATHS(쉼표로 구분한 체크포인트 경로 또는 디렉터리)가 있으면 앙상블,
+    없으면 MODEL_PATH의 단일 모델을 로드합니다.
+    """
+    ensemble_paths = os.getenv('ENSEMBLE_MODEL_PATHS')
+    if ensemble_paths:
+        paths = [path.strip() for path in ensemble_paths.split(',') if path.strip()]
+        return load_ensemble(paths, os.getenv('ENSEMBLE_METHOD', 'mean'))
+    return load_model(os.getenv('MODEL_PATH'))
+
+
 # 모델 로드 시도
-try:
-    model = load_model(MODEL_PATH)
-    logger.info("모델 로드에 성공했습니다.")
-except Exception as e:
-    logger.error(f"모델 로드 실패: {e}")
-    model = None
+# MODEL_LOAD_ON_IMPORT=false이면 임포트 시 로드하지 않음 (serve.py는 fork 이후 워커에서 로드)
+model = None
+if os.getenv('MODEL_LOAD_ON_IMPORT', 'true').lower() == 'true':
+    try:
+        model = load_configured_model()
+        logger.info("모델 로드에 성공했습니다.")
+    except Exception as e:
+        logger.error(f"모델 로드 실패: {e}")
 
 from sklearn.preprocessing import StandardScaler
 
@@ -58,6 +129,13 @@ def preprocess_input_data(data_array, expected_length=None):
 
 
 def predict(processed_data, model):
+    if isinstance(model, EnsembleModel):
+        try:
+            return predict_ensemble(processed_data, model)
+        except Exception as e:
+            logger.error(f"앙상블 예측 중 오류 발생: {e}")
+            return {'error': str(e)}
+
     try:
         logits = model.predict(processed_data)  # 소프트맥스가 적용되지 않은 경우
         probabilities = softmax(logits).numpy()  # 소프트맥스 적용
@@ -0,0 +1,161 @@
+"""
+운영 환경용 서버 실행 스크립트
+
+`python app.py`는 Flask 개발 서버(단일 프로세스, 리로더)로 동작하므로 운영에는 적합하지 않습니다.
+이 스크립트는 gunicorn prefork 서버로 애플리케이션을 실행합니다.
+
+- 애플리케이션 코드, TensorFlow 라이브러리, 조회 테이블은 마스터 프로세스에서 한 번만 임포트하고(preload),
+  fork된 워커들은 이를 copy-on-write로 공유합니다.
+- TensorFlow 런타임은 fork 이후 안전하지 않으므로(fork된 프로세스에서 predict가 멈출 수 있음)
+  모델은 마스터에서 로드하지 않고 각 워커가 fork 직후(post_fork)에 로드합니다.
+  따라서 모델 가중치는 워커마다 따로 메모리에 올라갑니다.
+- 워커 수, 워커당 스레드 수, TensorFlow intra/inter-op 스레드 수를 환경 변수로 조절하여
+  코어를 과도하게 점유하지 않도록 합니다.
+- 비동기 작업 큐 스레드는 워커마다 JOB_WORKERS개씩 시작되지만, 동시에 실행되는 분석 작업은
+  모든 워커를 합쳐 JOB_MAX_RUNNING개로 제한됩니다 (SERVE_WORKERS × JOB_WORKERS가 아님).
+- 마스터에 SIGHUP을 보내면 .env를 다시 읽고(SERVE_WORKERS/SERVE_THREADS/SERVE_TIMEOUT 포함)
+  워커를 순차적으로 교체하며, 새 워커는 모델을 다시 로드합니다(graceful reload).
+  TF_INTRA_OP_THREADS/TF_INTER_OP_THREADS는 마스터 시작 시에만 적용되므로 변경하려면 재시작해야 합니다.
+
+사용법:
+    python serve.py
+    kill -HUP <master pid>   # graceful reload
+"""
+import gc
+import os
+import logging
+import multiprocessing
+
+from dotenv import load_dotenv
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# .env 파일 로드
+load_dotenv()
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+
+def get_int_env(name, default):
+    """정수 환경 변수 읽기 (비어 있으면 기본값 사용)"""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    return int(value)
+
+
+# TensorFlow 스레드 설정 - 워커들이 나눠 쓰도록 기본값은 코어 수 / 워커 수
+TF_INTRA_OP_THREADS = get_int_env(
+    'TF_INTRA_OP_THREADS', max(1, CPU_COUNT // max(1, get_int_env('SERVE_WORKERS', CPU_COUNT)))
+)
+TF_INTER_OP_THREADS = get_int_env('TF_INTER_OP_THREADS', 1)
+
+
+def configure_thread_limits():
+    """
+    TensorFlow 및 수치 연산 라이브러리의 스레드 수 제한
+
+    TensorFlow가 초기화되기 전(모델 로드 전)에 호출해야 적용됩니다.
+    """
+    # numpy/scipy가 사용하는 BLAS 스레드 풀도 같은 값으로 제한
+    for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(name, str(TF_INTRA_OP_THREADS))
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(TF_INTRA_OP_THREADS)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(TF_INTER_OP_THREADS)
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(TF_INTRA_OP_THREADS)
+    tf.config.threading.set_inter_op_parallelism_threads(TF_INTER_OP_THREADS)
+    logger.info(
+        f"TensorFlow 스레드 설정: intra-op={TF_INTRA_OP_THREADS}, inter-op={TF_INTER_OP_THREADS}"
+    )
+
+
+configure_thread_limits()
+
+# 스레드 설정 이후에 애플리케이션 임포트 - 모델은 워커에서 로드하도록 임포트 시 로드하지 않음
+os.environ['MODEL_LOAD_ON_IMPORT'] = 'false'
+import app as flask_app_module  # noqa: E402
+from gunicorn.app.base import BaseApplication  # noqa: E402
+
+
+def build_options():
+    """환경 변수에서 gunicorn 설정 생성 (SIGHUP 시 다시 호출)"""
+    host = os.getenv('FLASK_HOST', '0.0.0.0')
+    port = int(os.getenv('FLASK_PORT', 5080))
+    threads = get_int_env('SERVE_THREADS', 1)
+    timeout = get_int_env('SERVE_TIMEOUT', 120)
+    return {
+        'bind': f"{host}:{port}",
+        'workers': get_int_env('SERVE_WORKERS', CPU_COUNT),
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'timeout': timeout,
+        'graceful_timeout': timeout,
+        'preload_app': True,
+        'post_fork': post_fork,
+    }
+
+
+def preload_application(reload=False):
+    """
+    마스터 프로세스에서 Flask 앱 반환 (TensorFlow 런타임은 초기화하지 않음)
+
+    모델은 새 워커가 post_fork에서 다시 로드합니다.
+    """
+    if reload:
+        gc.unfreeze()
+
+    # fork 전에 살아 있는 객체들을 GC 추적 대상에서 제외하여
+    # 워커에서 GC가 참조 카운트 페이지를 건드려 복사가 일어나는 것을 줄임
+    gc.collect()
+    gc.freeze()
+    return flask_app_module.app
+
+
+class APGServer(BaseApplication):
+    """gunicorn 애플리케이션 래퍼"""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        if self.application is None:
+            self.application = preload_application()
+        return self.application
+
+    def reload(self):
+        # SIGHUP: .env와 서버 설정을 다시 읽음 (워커는 gunicorn이 순차적으로 교체)
+        load_dotenv(override=True)
+        self.options = build_options()
+        super().reload()
+        self.application = preload_application(reload=True)
+        self.callable = self.application
+
+
+def post_fork(server, worker):
+    """fork 직후 워커에서 TensorFlow 런타임 초기화 및 모델 로드"""
+    logger.info(f"워커 시작 (pid: {worker.pid})")
+    flask_app_module.model = None
+    try:
+        flask_app_module.get_model()
+    except RuntimeError:
+        # 모델이 없어도 신호 분석 API는 동작하므로 워커는 계속 실행
+        logger.warning(f"모델 없이 워커를 시작합니다. (pid: {worker.pid})")
+
+
+if __name__ == '__main__':
+    options = build_options()
+    logger.info(
+        f"서버 시작: {options['bind']}, 워커 {options['workers']}개, 워커당 스레드 {options['threads']}개"
+    )
+    APGServer(options).run()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# 저장소 최상위 스크립트(apg_sweep.py 등)
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
@@ -0,0 +1,76 @@
+"""
+apg_archive 테스트 - 저장/조회, 중복 제거, 잘못된 샘플 처리
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from apg_archive import ApgArchive, import_csv_directory
+
+
+def test_append_round_trip_and_dedupe(tmp_path):
+    archive = ApgArchive(str(tmp_path / 'archive'))
+    first = archive.append([1, 2, 3], source='a.csv')
+    assert archive.append([1, 2, 3], source='b.csv') == first
+    assert len(archive) == 1
+    meta, samples = archive.get(first)
+    assert samples.tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize('value', [np.nan, np.inf, -np.inf])
+def test_append_rejects_non_finite(tmp_path, value):
+    archive = ApgArchive(str(tmp_path / 'archive'))
+    with pytest.raises(ValueError):
+        archive.append([1, value, 3])
+    assert len(archive) == 0
+
+
+def test_import_skips_non_finite_files(tmp_path):
+    csv_dir = tmp_path / 'csv'
+    csv_dir.mkdir()
+    pd.DataFrame({'APG Wave': [1, 2, 3]}).to_csv(csv_dir / 'good.csv', index=False)
+    pd.DataFrame({'APG Wave': [1, None, 3]}).to_csv(csv_dir / 'missing.csv', index=False)
+
+    archive = ApgArchive(str(tmp_path / 'archive'))
+    assert import_csv_directory(archive, str(csv_dir)) == (1, 1)
+
+
+def make_archive(tmp_path):
+    archive = ApgArchive(str(tmp_path / 'archive'))
+    archive.append([1, 2], subject_id='s1', recorded_at='2024-10-01 09:00:00')
+    archive.append([3, 4, 5], subject_id='s2', recorded_at='2024-10-02 09:00:00')
+    archive.append([6], subject_id='s1', recorded_at='2024-10-03 09:00:00')
+    return archive
+
+
+def test_find_and_scan_filters(tmp_path):
+    archive = make_archive(tmp_path)
+
+    assert [meta['recorded_at'][:10] for meta in archive.find(subject_id='s1')] == ['2024-10-01', '2024-10-03']
+    # end는 미포함
+    in_range = archive.find(start='2024-10-02 00:00:00', end='2024-10-03 09:00:00')
+    assert [meta['subject_id'] for meta in in_range] == ['s2']
+
+    scanned = [(meta['subject_id'], samples.tolist()) for meta, samples in archive.scan(subject_id='s1')]
+    assert scanned == [('s1', [1, 2]), ('s1', [6])]
+    scanned = [samples.tolist() for meta, samples in archive.scan(start='2024-10-02 00:00:00')]
+    assert scanned == [[3, 4, 5], [6]]
+    assert list(archive.scan(subject_id='missing')) == []
+
+
+def test_scan_sees_records_appended_after_mapping(tmp_path):
+    archive = make_archive(tmp_path)
+    assert len(list(archive.scan())) == 3  # 현재 파일 크기로 매핑됨
+
+    # 다른 프로세스가 매핑 이후, 색인 조회 직전에 측정을 추가하는 경우
+    writer = ApgArchive(archive.root)
+    original_find = archive.find
+
+    def find_after_append(**kwargs):
+        writer.append([7, 8, 9, 10], subject_id='s3', recorded_at='2024-10-04 09:00:00')
+        return original_find(**kwargs)
+
+    archive.find = find_after_append
+    scanned = {meta['subject_id']: samples.tolist() for meta, samples in archive.scan()}
+    assert scanned['s3'] == [7, 8, 9, 10]
@@ -0,0 +1,93 @@
+"""
+apg_features 테스트 - 장비 내보내기(`data files/`)와의 회귀 비교 포함
+"""
+import os
+import glob
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('scipy')
+
+from conftest import BACKEND_DIR
+from apg_features import (
+    DEVICE_COLUMNS, FEATURE_COLUMNS, extract_file_features, extract_files_features,
+    extract_recording_features, segment_beats, summarize_recording,
+)
+
+DATA_DIR = os.path.join(BACKEND_DIR, 'data files')
+WAVE_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'apg 파일', '*.csv')))
+EXPORT_FILE = os.path.join(DATA_DIR, '2024-10-11 (11-00-32)-APG【 이기장 】_3 (1).csv')
+
+# 장비 열 이름을 쓰는 특징의 측정별 중앙 상대 오차 허용치
+DEVICE_TOLERANCE = 0.10
+# 측정 간 변화가 장비 값을 따라가는지 확인하는 최소 순위 상관계수 (상수에 가까운 값 방지)
+DEVICE_MIN_CORRELATION = 0.5
+
+
+def test_segment_beats_empty_signal():
+    beats, durations = segment_beats([])
+    assert beats.shape == (0, 128)
+    assert durations.shape == (0,)
+
+    features = extract_recording_features([])
+    assert list(features.columns) == FEATURE_COLUMNS
+    assert len(features) == 0
+
+
+def test_summarize_recording_one_row_per_file():
+    table = extract_files_features(WAVE_FILES[:3])
+    assert list(table.index) == [os.path.basename(path) for path in WAVE_FILES[:3]]
+    assert list(table.columns) == FEATURE_COLUMNS + ['n_beats']
+    assert (table['n_beats'] > 0).all()
+
+    empty = summarize_recording(extract_recording_features([]))
+    assert empty['n_beats'] == 0
+
+
+@pytest.fixture(scope='module')
+def matched_recordings():
+    """장비 내보내기와 측정 시각이 일치하는 측정들의 (엔진 요약, 장비 값) 표"""
+    export = pd.read_csv(EXPORT_FILE)
+    export['key'] = pd.to_datetime(export['TestDate']).dt.strftime('%Y-%m-%d (%H-%M-%S)')
+    export = export.drop_duplicates('key').set_index('key')
+
+    engine_rows = []
+    device_rows = []
+    for path in WAVE_FILES:
+        key = os.path.basename(path)[:21]
+        if key not in export.index:
+            continue
+        engine_rows.append(summarize_recording(extract_file_features(path)))
+        device_rows.append(export.loc[key])
+    assert len(engine_rows) >= 50
+
+    engine = pd.DataFrame(engine_rows).reset_index(drop=True)
+    device = pd.DataFrame(device_rows).reset_index(drop=True)
+    return engine, device
+
+
+def device_agreement(engine_values, device_values):
+    """(중앙 상대 오차, 순위 상관계수)"""
+    expected = device_values.astype(float)
+    valid = engine_values.notna() & expected.notna() & (expected != 0)
+    relative_error = ((engine_values - expected).abs() / expected.abs())[valid].median()
+    correlation = engine_values[valid].corr(expected[valid], method='spearman')
+    return relative_error, correlation
+
+
+def test_device_columns_match_export(matched_recordings):
+    engine, device = matched_recordings
+    for column in DEVICE_COLUMNS:
+        relative_error, correlation = device_agreement(engine[column], device[column])
+        assert relative_error <= DEVICE_TOLERANCE, f"{column}: {relative_error:.3f}"
+        assert correlation >= DEVICE_MIN_CORRELATION, f"{column}: r={correlation:.3f}"
+
+
+def test_onset_offset_is_not_device_atime(matched_recordings):
+    # a_ms는 시작점 정의상 거의 상수이므로 중앙값 근처에 있어도 장비 aTime 검증을 통과하면 안 됨
+    engine, device = matched_recordings
+    relative_error, correlation = device_agreement(engine['a_ms'], device['aTime'])
+    assert relative_error <= DEVICE_TOLERANCE
+    assert correlation < DEVICE_MIN_CORRELATION
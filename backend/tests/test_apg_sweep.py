@@ -0,0 +1,130 @@
+"""
+apg_sweep 테스트 - 탐색 공간, 시도 해시, 조기 중단 판단, 캐시, 리더보드 (학습 없이 실행)
+"""
+import os
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+from apg_sweep import (
+    DEFAULT_CONFIG, config_hash, expand_space, intermediate_db_path, load_cached_result,
+    make_leaderboard, run_sweep, should_prune,
+)
+
+
+def make_result(trial, status='complete', val_accuracy=0.5, inference_ms=1.0, config=None):
+    return {
+        'trial': trial,
+        'status': status,
+        'val_accuracy': val_accuracy,
+        'best_val_accuracy': val_accuracy,
+        'epochs_run': 10,
+        'train_time_s': 1.0,
+        'inference_ms_per_sample': inference_ms,
+        'params': 100,
+        'config': config or dict(DEFAULT_CONFIG),
+    }
+
+
+def test_expand_space_combinations():
+    configs = expand_space({'dropout1': [0.3, 0.5], 'learning_rate': [0.001, 0.0005], 'epochs': 5})
+    assert len(configs) == 4
+    assert {(c['dropout1'], c['learning_rate']) for c in configs} == {
+        (0.3, 0.001), (0.3, 0.0005), (0.5, 0.001), (0.5, 0.0005)
+    }
+    for config in configs:
+        assert config['epochs'] == 5
+        assert set(config) == set(DEFAULT_CONFIG)
+
+    assert expand_space({}) == [DEFAULT_CONFIG]
+
+
+def test_expand_space_max_trials_is_seeded():
+    space = {'conv1_filters': [16, 32, 64, 128], 'dropout1': [0.1, 0.3, 0.5]}
+    sampled = expand_space(space, max_trials=5, seed=1)
+    assert len(sampled) == 5
+    assert sampled == expand_space(space, max_trials=5, seed=1)
+
+
+def test_expand_space_rejects_unknown_keys():
+    with pytest.raises(ValueError, match='dropout_1'):
+        expand_space({'dropout_1': [0.3]})
+
+
+def test_config_hash_depends_on_config_and_data():
+    config = dict(DEFAULT_CONFIG)
+    assert config_hash(config, 'data-a') == config_hash(dict(reversed(list(config.items()))), 'data-a')
+    assert config_hash(config, 'data-a') != config_hash(config, 'data-b')
+    assert config_hash(config, 'data-a') != config_hash(dict(config, dropout1=0.1), 'data-a')
+
+
+def test_should_prune_median_warmup_min_trials(tmp_path):
+    run_sweep([], '', 'data', str(tmp_path))  # 테이블 생성
+    db_path = intermediate_db_path(str(tmp_path), 'data')
+
+    # 비교할 시도가 min_trials개 미만이면 중단하지 않음
+    assert not should_prune(db_path, 't1', 5, 0.8, warmup_epochs=2, min_trials=2)
+    assert not should_prune(db_path, 't2', 5, 0.6, warmup_epochs=2, min_trials=2)
+    # 중앙값(0.7)보다 낮으면 중단, 높으면 계속
+    assert should_prune(db_path, 't3', 5, 0.65, warmup_epochs=2, min_trials=2)
+    assert not should_prune(db_path, 't4', 5, 0.75, warmup_epochs=2, min_trials=2)
+    # warmup 에폭 이전에는 중단하지 않음
+    should_prune(db_path, 't1', 1, 0.9, warmup_epochs=2, min_trials=1)
+    assert not should_prune(db_path, 't2', 1, 0.1, warmup_epochs=2, min_trials=1)
+
+
+def test_pruning_history_separate_per_dataset(tmp_path):
+    output_dir = str(tmp_path)
+    run_sweep([], '', 'a' * 64, output_dir)
+    run_sweep([], '', 'b' * 64, output_dir)
+    db_a = intermediate_db_path(output_dir, 'a' * 64)
+    db_b = intermediate_db_path(output_dir, 'b' * 64)
+    assert db_a != db_b
+    assert os.path.exists(db_a) and os.path.exists(db_b)
+
+    # 다른 데이터셋에서 정확도가 높은 시도들이 있어도 이 데이터셋의 시도는 중단되지 않음
+    should_prune(db_a, 'a1', 5, 0.9, warmup_epochs=0, min_trials=2)
+    should_prune(db_a, 'a2', 5, 0.95, warmup_epochs=0, min_trials=2)
+    assert not should_prune(db_b, 'b1', 5, 0.3, warmup_epochs=0, min_trials=2)
+
+
+def test_run_sweep_uses_cache(tmp_path):
+    output_dir = str(tmp_path)
+    configs = expand_space({'dropout1': [0.3, 0.5]})
+    trial_dir = tmp_path / 'trials'
+    trial_dir.mkdir()
+    for i, config in enumerate(configs):
+        trial = config_hash(config, 'data')
+        (trial_dir / f"{trial}.json").write_text(json.dumps(make_result(trial, val_accuracy=0.1 * i, config=config)))
+
+    # 모든 시도가 캐시되어 있으면 학습 프로세스 없이 캐시 결과만 반환
+    results = run_sweep(configs, str(tmp_path / 'missing.npz'), 'data', output_dir, jobs=1)
+    assert sorted(result['trial'] for result in results) == sorted(config_hash(c, 'data') for c in configs)
+
+
+def test_pruned_results_are_not_cached(tmp_path):
+    trial_dir = str(tmp_path)
+    with open(os.path.join(trial_dir, 'pruned.json'), 'w') as f:
+        json.dump(make_result('pruned', status='pruned'), f)
+    with open(os.path.join(trial_dir, 'complete.json'), 'w') as f:
+        json.dump(make_result('complete'), f)
+
+    assert load_cached_result(trial_dir, 'pruned') is None
+    assert load_cached_result(trial_dir, 'missing') is None
+    assert load_cached_result(trial_dir, 'complete')['trial'] == 'complete'
+
+
+def test_leaderboard_ordering():
+    leaderboard = make_leaderboard([
+        make_result('slow', val_accuracy=0.8, inference_ms=2.0),
+        make_result('pruned', status='pruned', val_accuracy=0.9),
+        make_result('fast', val_accuracy=0.8, inference_ms=1.0),
+        make_result('best', val_accuracy=0.85, inference_ms=5.0),
+    ])
+    # 완료된 시도: 정확도 내림차순, 같으면 추론 시간 오름차순 / 조기 중단된 시도는 맨 뒤
+    assert leaderboard['trial'].tolist() == ['best', 'fast', 'slow', 'pruned']
+    assert 'dropout1' in leaderboard.columns
+    assert make_leaderboard([]).empty
@@ -0,0 +1,147 @@
+"""
+job_queue 테스트 - 재시도/실패 처리, 임대 연장, 워커 스레드 복구
+"""
+import time
+import threading
+
+from job_queue import JobQueue, PermanentJobError, QUEUED, DONE, FAILED
+
+
+def make_queue(tmp_path, **kwargs):
+    kwargs.setdefault('max_workers', 0)
+    kwargs.setdefault('poll_interval', 0.01)
+    return JobQueue(str(tmp_path / 'jobs.sqlite3'), **kwargs)
+
+
+def wait_for_status(queue, job_id, statuses, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"작업 상태가 바뀌지 않았습니다: {queue.get(job_id)}")
+
+
+def test_permanent_error_fails_without_retry(tmp_path):
+    queue = make_queue(tmp_path)
+
+    def handler(payload):
+        raise PermanentJobError('잘못된 입력')
+
+    queue.register('job', handler)
+    job_id = queue.submit('job', {})
+    queue._run(queue._claim())
+
+    job = queue.get(job_id)
+    assert job['status'] == FAILED
+    assert job['attempts'] == 1
+
+
+def test_expired_lease_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2, lease_seconds=0)
+    queue.register('job', lambda payload: payload)
+    job_id = queue.submit('job', {})
+
+    # 워커가 처리 중 종료된 상황: 임대 시간이 지나도록 상태를 기록하지 않음
+    assert queue._claim()['id'] == job_id
+    time.sleep(0.01)
+    assert queue._claim()['id'] == job_id
+    time.sleep(0.01)
+    assert queue._claim() is None
+
+    job = queue.get(job_id)
+    assert job['status'] == FAILED
+    assert job['attempts'] == 2
+
+
+def test_lease_renewed_while_running(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.2)
+    claimed = []
+
+    def handler(payload):
+        # 임대 시간보다 오래 실행되는 동안 다른 워커가 같은 작업을 가져가지 않아야 함
+        deadline = time.time() + 0.6
+        while time.time() < deadline:
+            claimed.append(queue._claim())
+            time.sleep(0.05)
+        return {'ok': True}
+
+    queue.register('job', handler)
+    job_id = queue.submit('job', {})
+    queue._run(queue._claim())
+
+    assert claimed and all(job is None for job in claimed)
+    job = queue.get(job_id)
+    assert job['status'] == DONE
+    assert job['attempts'] == 1
+
+
+def test_worker_survives_finish_failure(tmp_path):
+    queue = make_queue(tmp_path, max_workers=1, max_attempts=1)
+    # JSON으로 저장할 수 없는 결과 -> _finish에서 예외
+    queue.register('bad', lambda payload: object())
+    queue.register('good', lambda payload: {'ok': True})
+
+    try:
+        bad_id = queue.submit('bad', {})
+        bad = wait_for_status(queue, bad_id, (FAILED,))
+        assert bad['error']
+
+        good_id = queue.submit('good', {})
+        good = wait_for_status(queue, good_id, (DONE,))
+        assert good['result'] == {'ok': True}
+    finally:
+        queue.stop(timeout=5)
+
+
+def test_submit_with_job_id(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.register('job', lambda payload: payload)
+    job_id = queue.new_job_id()
+
+    assert queue.submit('job', {'file_path': f"uploads/job_{job_id}.csv"}, job_id=job_id) == job_id
+    assert queue.get(job_id)['status'] == QUEUED
+
+
+def test_max_running_is_shared_across_processes(tmp_path):
+    # 같은 DB를 쓰는 두 큐 = gunicorn 워커 두 개
+    first = make_queue(tmp_path, max_running=1)
+    second = make_queue(tmp_path, max_running=1)
+    for queue in (first, second):
+        queue.register('job', lambda payload: payload)
+    job_ids = [first.submit('job', {'n': i}) for i in range(2)]
+
+    claimed = first._claim()
+    assert claimed['id'] == job_ids[0]
+    assert second._claim() is None
+
+    first._finish(claimed['id'], DONE, result={})
+    assert second._claim()['id'] == job_ids[1]
+
+
+def test_max_running_limits_concurrent_handlers(tmp_path):
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def handler(payload):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+        return payload
+
+    queues = [make_queue(tmp_path, max_workers=3, max_running=2) for _ in range(2)]
+    for queue in queues:
+        queue.register('job', handler)
+    try:
+        job_ids = [queues[i % 2].submit('job', {'n': i}) for i in range(8)]
+        for job_id in job_ids:
+            wait_for_status(queues[0], job_id, (DONE,))
+    finally:
+        for queue in queues:
+            queue.stop(timeout=5)
+
+    assert state['peak'] <= 2
@@ -0,0 +1,104 @@
+"""
+앙상블 테스트 - 확률 변환/결합(TensorFlow 없이)과 융합 모델 출력 형태(TensorFlow 필요)
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ensemble import EnsembleModel, predict_ensemble, to_probabilities
+
+NUM_CLASSES = 4
+INPUT_LENGTH = 20
+
+
+class FixedOutputs:
+    """고정된 (샘플, 멤버, 클래스) 출력을 반환하는 융합 모델 대역"""
+
+    def __init__(self, outputs):
+        self.outputs = np.asarray(outputs, dtype=np.float64)
+
+    def predict_on_batch(self, processed_data):
+        return self.outputs
+
+
+def fixed_ensemble(outputs, method='mean'):
+    outputs = np.asarray(outputs, dtype=np.float64)
+    names = [f"m{i}" for i in range(outputs.shape[1])]
+    return EnsembleModel(FixedOutputs(outputs), names, method)
+
+
+def test_to_probabilities_per_member():
+    probabilities = [0.9, 0.05, 0.05]
+    logits = [2.0, 0.0, -1.0]
+    converted = to_probabilities([[probabilities, logits]])
+
+    # 확률을 출력하는 멤버는 그대로, 로짓을 출력하는 멤버에만 소프트맥스 적용
+    np.testing.assert_allclose(converted[0, 0], probabilities)
+    expected = np.exp(logits) / np.exp(logits).sum()
+    np.testing.assert_allclose(converted[0, 1], expected)
+    np.testing.assert_allclose(converted.sum(axis=-1), 1.0)
+
+
+def test_predict_ensemble_mean():
+    outputs = [
+        [[0.7, 0.2, 0.1], [0.6, 0.3, 0.1], [0.1, 0.8, 0.1]],
+        [[0.1, 0.1, 0.8], [0.2, 0.2, 0.6], [0.3, 0.3, 0.4]],
+    ]
+    result = predict_ensemble(None, fixed_ensemble(outputs))
+
+    assert result['predictions'] == [0, 2]
+    np.testing.assert_allclose(result['confidence_scores'], [1.4 / 3, 1.8 / 3])
+    assert result['ensemble']['member_predictions'] == [[0, 0, 1], [2, 2, 2]]
+    np.testing.assert_allclose(result['ensemble']['disagreement'], [1 / 3, 0.0])
+    assert result['ensemble']['member_disagreement'] == {'m0': 0.0, 'm1': 0.0, 'm2': 0.5}
+
+
+def test_predict_ensemble_vote_tie_break():
+    # 멤버 2개가 각각 클래스 0, 1에 투표 -> 평균 확률이 높은 클래스 1 선택
+    outputs = [[[0.5, 0.4, 0.1], [0.05, 0.9, 0.05]]]
+    result = predict_ensemble(None, fixed_ensemble(outputs, method='vote'))
+
+    assert result['predictions'] == [1]
+    assert result['confidence_scores'] == [0.5]
+    assert result['ensemble']['disagreement'] == [0.5]
+    assert result['ensemble']['member_disagreement'] == {'m0': 1.0, 'm1': 0.0}
+
+
+def test_predict_ensemble_vote_majority():
+    # 다수결이 평균 확률보다 우선
+    outputs = [[[0.4, 0.6, 0.0], [0.4, 0.6, 0.0], [0.0, 0.0, 1.0]]]
+    result = predict_ensemble(None, fixed_ensemble(outputs, method='vote'))
+
+    assert result['predictions'] == [1]
+    np.testing.assert_allclose(result['confidence_scores'], [2 / 3])
+    np.testing.assert_allclose(result['ensemble']['disagreement'], [1 / 3])
+
+
+def save_member(tf, path, seed):
+    tf.keras.utils.set_random_seed(seed)
+    member = tf.keras.Sequential([
+        tf.keras.Input(shape=(INPUT_LENGTH, 1)),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(NUM_CLASSES, activation='softmax'),
+    ])
+    member.save(str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize('n_members', [1, 2])
+def test_ensemble_output_shape(tmp_path, n_members):
+    tf = pytest.importorskip('tensorflow')
+    pytest.importorskip('sklearn')
+    from model import load_ensemble, predict
+
+    paths = [save_member(tf, tmp_path / f"member_{i}.keras", seed=i) for i in range(n_members)]
+    ensemble = load_ensemble(paths)
+    data = np.random.default_rng(0).normal(size=(3, INPUT_LENGTH, 1)).astype('float32')
+
+    outputs = ensemble.predict(data)
+    assert outputs.shape == (3, n_members, NUM_CLASSES)
+
+    result = predict(data, ensemble)
+    assert 'error' not in result
+    assert len(result['predictions']) == 3
+    assert np.array(result['ensemble']['member_predictions']).shape == (3, n_members)
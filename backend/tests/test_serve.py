@@ -0,0 +1,74 @@
+"""
+serve.py 스모크 테스트 - fork된 워커에서 모델 로드와 predict가 멈추지 않고 동작하는지 확인
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+pytest.importorskip('tensorflow')
+pytest.importorskip('gunicorn')
+pytest.importorskip('flask_jwt_extended')
+pytest.importorskip('mysql.connector')
+
+from conftest import BACKEND_DIR
+
+# 마스터(serve 임포트) -> fork된 워커 2개에서 post_fork 후 predict
+WORKER_SCRIPT = """
+import os, sys, json, multiprocessing
+import numpy as np
+import serve
+from model import predict
+
+def worker(queue):
+    class Worker:
+        pid = os.getpid()
+    serve.post_fork(None, Worker())
+    result = predict(np.zeros((2, 200, 1)), serve.flask_app_module.get_model())
+    queue.put(result)
+
+if __name__ == '__main__':
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    processes = [context.Process(target=worker, args=(queue,)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    results = [queue.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join(30)
+    print(json.dumps({'results': results, 'exitcodes': [p.exitcode for p in processes]}))
+"""
+
+
+def test_predict_in_forked_workers(tmp_path):
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(200, 1)),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(18, activation='softmax'),
+    ])
+    model_path = str(tmp_path / 'model.keras')
+    model.save(model_path)
+
+    env = dict(
+        os.environ,
+        JWT_SECRET_KEY='test',
+        MODEL_PATH=model_path,
+        ENSEMBLE_MODEL_PATHS='',
+        JOB_DB_PATH=str(tmp_path / 'jobs.sqlite3'),
+        SERVE_WORKERS='2',
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', WORKER_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    output = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert output['exitcodes'] == [0, 0]
+    for result in output['results']:
+        assert 'error' not in result
+        assert len(result['predictions']) == 2